@@ -0,0 +1,152 @@
+""" 棋盘难度分析：3BV、开口数、孤岛数，以及批量统计种子文件的命令行工具
+
+用法：
+    python board_analytics.py seeds.txt [--workers N] [--batch N] [--summary-only]
+
+每行一个地图种子；逐行输出每个棋盘的指标（JSON），最后在标准错误输出汇总统计。
+"""
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+# 无窗口运行：导入游戏模块前切换到SDL的dummy驱动
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from minesweeper import iter_batches, parse_map_seed  # noqa: E402
+
+
+def _dilate(bits, width):
+    """ 位并行膨胀：每个置位格扩展到其8邻域 """
+    bits |= (bits << 1) | (bits >> 1)
+    return bits | (bits << width) | (bits >> width)
+
+
+def _count_regions(mask, width):
+    """ 统计mask中8连通区域的个数：每次取最低位，反复膨胀直到填满所在区域 """
+    count = 0
+    while mask:
+        region = mask & -mask
+        while True:
+            grown = _dilate(region, width) & mask
+            if grown == region:
+                break
+            region = grown
+        mask ^= region
+        count += 1
+    return count
+
+
+def board_metrics(mines, rows, cols):
+    """ 计算棋盘指标，mines为按行展开的地雷布尔序列
+
+    3bv：清空棋盘所需的最少点击数（开口数 + 不与任何开口相邻的数字格数）
+    openings：0格组成的8连通区域个数
+    islands：不与开口相邻的数字格组成的8连通区域个数
+
+    整个棋盘编码为一个大整数（每格一位），四周加一圈空边框，
+    所有邻域运算都是整数移位与按位运算，不逐格循环。
+    """
+    width = cols + 2
+    border = "0" * width
+    empty_row = "0" + "1" * cols + "0"
+    # 位串按高位在前书写，因此整体反转：第pos格对应第pos位
+    mine_rows = ["0" + "".join("1" if m else "0" for m in mines[x * cols:(x + 1) * cols]) + "0"
+                 for x in range(rows)]
+    mine_bits = int((border + "".join(mine_rows) + border)[::-1], 2)
+    inner = int((border + empty_row * rows + border)[::-1], 2)
+
+    safe = inner & ~mine_bits
+    zero = safe & ~_dilate(mine_bits, width)
+    # 不与任何0格相邻的安全格，只能单独点击
+    island = safe & ~_dilate(zero, width)
+
+    openings = _count_regions(zero, width)
+    return {
+        "rows": rows,
+        "cols": cols,
+        "mines": bin(mine_bits).count("1"),
+        "3bv": openings + bin(island).count("1"),
+        "openings": openings,
+        "islands": _count_regions(island, width),
+    }
+
+
+def seed_metrics(seed):
+    """ 计算地图种子对应棋盘的指标；种子无效时返回None """
+    data = parse_map_seed(seed)
+    if data is None:
+        return None
+    rows, cols = data["rows"], data["cols"]
+    mines = [bool(m) for row in data["board"][:rows] for m in row[:cols]]
+    if len(mines) != rows * cols:
+        return None
+    return board_metrics(mines, rows, cols)
+
+
+def summarize(histogram):
+    """ 根据取值直方图（Counter）计算分布摘要，内存只与不同取值的个数有关 """
+    count = sum(histogram.values())
+    if not count:
+        return {"count": 0}
+    values = sorted(histogram)
+
+    def percentile(p):
+        rank = min(count - 1, int(p * count))
+        seen = 0
+        for value in values:
+            seen += histogram[value]
+            if seen > rank:
+                return value
+
+    return {
+        "count": count,
+        "min": values[0],
+        "max": values[-1],
+        "mean": round(sum(v * c for v, c in histogram.items()) / count, 3),
+        "p10": percentile(0.1),
+        "p50": percentile(0.5),
+        "p90": percentile(0.9),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量计算地图种子的3BV、开口数和孤岛数")
+    parser.add_argument("seeds", help="种子文件，每行一个种子；'-'表示标准输入")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="工作进程数")
+    parser.add_argument("--batch", type=int, default=4096, help="每批读取的种子数")
+    parser.add_argument("--summary-only", action="store_true", help="只输出汇总统计")
+    args = parser.parse_args(argv)
+
+    stats = {"3bv": Counter(), "openings": Counter(), "islands": Counter()}
+    invalid = 0
+    line_no = 0
+    seeds_file = sys.stdin if args.seeds == "-" else open(args.seeds, encoding="utf-8")
+    with seeds_file, ProcessPoolExecutor(max_workers=args.workers) as pool:
+        seeds = (line.strip() for line in seeds_file)
+        for batch in iter_batches(seeds, args.batch):
+            chunksize = max(1, len(batch) // (args.workers * 4))
+            for seed, metrics in zip(batch, pool.map(seed_metrics, batch, chunksize=chunksize)):
+                line_no += 1
+                if not seed:
+                    continue
+                if metrics is None:
+                    invalid += 1
+                    if not args.summary_only:
+                        print(json.dumps({"line": line_no, "error": "invalid seed"}))
+                    continue
+                for key, histogram in stats.items():
+                    histogram[metrics[key]] += 1
+                if not args.summary_only:
+                    print(json.dumps({"line": line_no, **metrics}))
+
+    summary = {key: summarize(histogram) for key, histogram in stats.items()}
+    summary["invalid"] = invalid
+    print(json.dumps(summary, ensure_ascii=False), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,16 @@ import os
 import pyperclip
 import json
 import zlib
+import time
+import struct
+import threading
+import tempfile
+import base64
+import binascii
+import hashlib
+from array import array
+from functools import lru_cache
+from itertools import accumulate, islice
 
 # 游戏配置
 
@@ -14,6 +24,16 @@ COLS = 30
 
 WIDTH, HEIGHT = GRID_SIZE * COLS, GRID_SIZE * ROWS + 80
 MINES = 99
+RENDER_FPS = 30  # 渲染帧率上限；输入处理不受此限制
+TOPOLOGY = "square"  # 棋盘拓扑：square（普通）、torus（上下左右循环）、hex（六边形，奇数行右移半格）
+
+UNDO_PENALTY = 10  # 练习模式下撤销一步追加的罚时（秒）
+
+SAVE_FILE = "minesweeper.sav"  # 存档文件
+SAVE_MAGIC = b'MSSV'
+SAVE_VERSION = 2  # 版本2增加作弊高亮位图；版本1的存档仍可读取
+# 存档头：魔数,版本,行,列,雷数,作弊次数,标志位,已用时间(ms),总暂停时间(ms),种子长度
+SAVE_HEADER = struct.Struct('<4sBHHIBBIIH')
 
 COLORS = {
     "bg": (189, 189, 189),
@@ -64,16 +84,165 @@ pygame.display.set_caption("扫雷-自制版")
 # 使用系统自带中文字体（Windows/Mac通用方案）
 font = pygame.font.SysFont("SimHei", max(int(20 * COLS / 30), 14))  # 黑体
 
-clock = pygame.time.Clock()
-
 
 class Cell:
+    # 大棋盘上格子数以百万计，使用__slots__减少每个格子的内存
+    __slots__ = ("is_mine", "revealed", "flagged", "question_mark", "neighbor_mines", "cheat_highlighted")
+
     def __init__(self):
         self.is_mine = False
         self.revealed = False
         self.flagged = False
         self.question_mark = False  # 新增：表示该格子是否被打上了问号
         self.neighbor_mines = 0
+        self.cheat_highlighted = False  # 作弊功能标出的地雷
+
+
+class NeighborTable:
+    """ 邻居表（CSR结构），每种棋盘尺寸和拓扑只构建一次
+
+    offsets[pos] 到 offsets[pos + 1] 之间的 indices 即第pos格（pos = 行 * COLS + 列）的邻居下标。
+    """
+
+    def __init__(self, rows, cols, topology="square"):
+        self.rows = rows
+        self.cols = cols
+        self.topology = topology
+        if topology == "square":
+            counts = self._build_square()
+        else:
+            self.indices = array('i')
+            counts = []
+            for x in range(rows):
+                for y in range(cols):
+                    neighbors = self._raw_neighbors(x, y)
+                    self.indices.extend(neighbors)
+                    counts.append(len(neighbors))
+        self.offsets = array('i', accumulate(counts, initial=0))
+
+    def _build_square(self):
+        """ 普通棋盘：同类行（首行/中间行/末行）的邻居相对行首偏移相同，按行模板整行生成 """
+        rows, cols = self.rows, self.cols
+        self.indices = array('i')
+        templates = {}
+        counts = []
+        for x in range(rows):
+            kind = (x > 0, x < rows - 1)
+            if kind not in templates:
+                row_deltas = [dx for dx, present in ((-1, kind[0]), (0, True), (1, kind[1])) if present]
+                template, template_counts = [], []
+                for y in range(cols):
+                    neighbors = [dx * cols + j for dx in row_deltas
+                                 for j in range(max(0, y - 1), min(cols, y + 2)) if dx or j != y]
+                    template.extend(neighbors)
+                    template_counts.append(len(neighbors))
+                templates[kind] = (template, template_counts)
+            template, template_counts = templates[kind]
+            base = x * cols
+            self.indices.extend([base + d for d in template])
+            counts.extend(template_counts)
+        return counts
+
+    def _raw_neighbors(self, x, y):
+        """ 按拓扑计算(x, y)的邻居下标（用于torus和hex） """
+        rows, cols = self.rows, self.cols
+        if self.topology == "torus":
+            result = []
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    pos = (x + dx) % rows * cols + (y + dy) % cols
+                    # 行或列数很少时，循环后的邻居可能重复或落回自身
+                    if pos != x * cols + y and pos not in result:
+                        result.append(pos)
+            return result
+        if self.topology == "hex":
+            shift = x & 1  # 奇数行右移半格
+            candidates = [(x, y - 1), (x, y + 1),
+                          (x - 1, y - 1 + shift), (x - 1, y + shift),
+                          (x + 1, y - 1 + shift), (x + 1, y + shift)]
+            return [i * cols + j for i, j in candidates if 0 <= i < rows and 0 <= j < cols]
+        raise ValueError(f"未知的棋盘拓扑: {self.topology}")
+
+    def positions(self, pos):
+        """ 第pos格的邻居下标 """
+        return self.indices[self.offsets[pos]:self.offsets[pos + 1]]
+
+    def neighbors(self, x, y):
+        """ 返回(x, y)的邻居坐标，不含自身 """
+        cols = self.cols
+        return [divmod(n, cols) for n in self.positions(x * cols + y)]
+
+
+@lru_cache(maxsize=16)
+def build_neighbor_table(rows, cols, topology="square"):
+    return NeighborTable(rows, cols, topology)
+
+
+def neighbor_table():
+    """ 当前棋盘尺寸和拓扑对应的邻居表 """
+    return build_neighbor_table(ROWS, COLS, TOPOLOGY)
+
+
+# 格子状态编码（每格2位）
+STATE_HIDDEN = 0
+STATE_REVEALED = 1
+STATE_FLAGGED = 2
+STATE_QUESTION = 3
+
+
+def pack_cell_states(board):
+    """ 将翻开/旗帜/问号状态打包为每格2位的字节串 """
+    cells = [cell for row in board for cell in row]
+    packed = bytearray((len(cells) + 3) // 4)
+    for pos, cell in enumerate(cells):
+        if cell.revealed:
+            state = STATE_REVEALED
+        elif cell.flagged:
+            state = STATE_FLAGGED
+        elif cell.question_mark:
+            state = STATE_QUESTION
+        else:
+            continue
+        packed[pos >> 2] |= state << ((pos & 3) << 1)
+    return bytes(packed)
+
+
+def unpack_cell_states(board, packed):
+    """ 将 pack_cell_states 的结果写回棋盘 """
+    pos = 0
+    for row in board:
+        for cell in row:
+            state = (packed[pos >> 2] >> ((pos & 3) << 1)) & 3
+            cell.revealed = state == STATE_REVEALED
+            cell.flagged = state == STATE_FLAGGED
+            cell.question_mark = state == STATE_QUESTION
+            pos += 1
+
+
+def pack_cell_bits(board, attr):
+    """ 将每个格子的一个布尔属性打包为每格1位的字节串 """
+    cells = [cell for row in board for cell in row]
+    packed = bytearray((len(cells) + 7) // 8)
+    for pos, cell in enumerate(cells):
+        if getattr(cell, attr):
+            packed[pos >> 3] |= 1 << (pos & 7)
+    return bytes(packed)
+
+
+def pack_mines(board):
+    """ 将地雷布局打包为每格1位的字节串 """
+    return pack_cell_bits(board, "is_mine")
+
+
+class BoardSnapshot:
+    """ 棋盘状态快照：只保存可变部分，地雷布局不变 """
+    __slots__ = ("states", "game_over", "victory", "first_click")
+
+    def __init__(self, states, game_over, victory, first_click):
+        self.states = states
+        self.game_over = game_over
+        self.victory = victory
+        self.first_click = first_click
 
 
 def create_board():
@@ -87,21 +256,47 @@ def create_board():
         board[x][y].is_mine = True
 
     # 计算相邻雷数（修复关键错误）
-    for i in range(ROWS):
-        for j in range(COLS):
-            if not board[i][j].is_mine:
-                board[i][j].neighbor_mines = count_neighbor_mines(board, i, j)
+    fill_neighbor_mines(board)
     return board
 
 
 def count_neighbor_mines(board, x, y):
     """ 独立函数：计算相邻雷数 """
-    count = 0
-    for i in range(max(0, x - 1), min(ROWS, x + 2)):
-        for j in range(max(0, y - 1), min(COLS, y + 2)):
-            if board[i][j].is_mine:
-                count += 1
-    return count
+    return sum(1 for i, j in neighbor_table().neighbors(x, y) if board[i][j].is_mine)
+
+
+def fill_neighbor_mines(board, mines=None):
+    """ 计算整个棋盘每个非雷格子的相邻雷数
+
+    mines为按行展开、每格一个字节的地雷标志（如读档时整块解码的结果），省略时从棋盘读取
+    """
+    if mines is None:
+        mines = bytes(cell.is_mine for row in board for cell in row)
+    if TOPOLOGY == "square":
+        # 普通棋盘按行计算，不需要构建邻居表：先求每行的横向三格和，再把上中下三行相加（含自身，雷格不使用）
+        rows, cols = ROWS, COLS
+        zero_row = [0] * cols
+
+        def row_sums(x):
+            if not 0 <= x < rows:
+                return zero_row
+            padded = b"\0" + mines[x * cols:(x + 1) * cols] + b"\0"
+            return [a + b + c for a, b, c in zip(padded, padded[1:], padded[2:])]
+
+        above, current = zero_row, row_sums(0)
+        for x, row in enumerate(board):
+            below = row_sums(x + 1)
+            for cell, is_mine, up, mid, down in zip(row, mines[x * cols:(x + 1) * cols], above, current, below):
+                if not is_mine:
+                    cell.neighbor_mines = up + mid + down
+            above, current = current, below
+        return
+
+    table = neighbor_table()
+    indices, offsets = table.indices, table.offsets
+    for pos, cell in enumerate(cell for row in board for cell in row):
+        if not mines[pos]:
+            cell.neighbor_mines = sum(map(mines.__getitem__, indices[offsets[pos]:offsets[pos + 1]]))
 
 
 class GameState:
@@ -119,107 +314,194 @@ class GameState:
         self.paused = False
         self.pause_start_time = 0
         self.total_paused_duration = 0  # 新增：记录总暂停时间
+        self.practice = False  # 新增：练习模式，允许撤销，成绩标注为练习
+        self.history = []  # 新增：撤销用的快照栈
+
+    def snapshot(self):
+        """ 捕获当前棋盘状态，供撤销或求解器试探使用 """
+        return BoardSnapshot(pack_cell_states(self.board), self.game_over, self.victory, self.first_click)
+
+    def restore(self, snap):
+        """ 恢复到 snapshot() 捕获的状态 """
+        unpack_cell_states(self.board, snap.states)
+        self.game_over = snap.game_over
+        self.victory = snap.victory
+        self.first_click = snap.first_click
+
+    def record_history(self, before):
+        """ 操作后调用：练习模式下，只有状态确实发生变化时才把操作前的快照压入撤销栈
+
+        首次点击前的状态不记录：撤销回那里会让下一次点击重新生成棋盘并重置计时
+        """
+        if not self.practice or before.first_click:
+            return
+        if (before.states != pack_cell_states(self.board) or before.game_over != self.game_over
+                or before.victory != self.victory):
+            self.history.append(before)
+
+    def undo(self):
+        """ 撤销上一步操作，并追加罚时；只在练习模式下可用 """
+        if not self.practice or not self.history:
+            return False
+        self.restore(self.history.pop())
+        self.start_time -= UNDO_PENALTY
+        return True
+
+    def paused_duration(self):
+        """ 累计暂停时间（秒），包含正在进行的暂停 """
+        paused = self.total_paused_duration
+        if self.paused:
+            paused += time.perf_counter() - self.pause_start_time
+        return paused
+
+    def play_time(self):
+        """ 已用游戏时间（秒），不含暂停；使用高精度单调时钟 """
+        return max(0.0, time.perf_counter() - self.start_time - self.paused_duration())
 
     def create_board(self, first_click_row, first_click_col):
         return create_board_safe_first_click(first_click_row, first_click_col)
 
     def count_neighbor_mines(self, x, y):
-        count = 0
-        for i in range(max(0, x - 1), min(ROWS, x + 2)):
-            for j in range(max(0, y - 1), min(COLS, y + 2)):
-                if self.board[i][j].is_mine:
-                    count += 1
-        return count
+        return count_neighbor_mines(self.board, x, y)
 
 
 def generate_map_seed(first_click_row, first_click_col, board):
     """ 生成地图种子 - 新版本使用更紧凑的编码 """
-    # 尝试使用新的紧凑编码方式
+    data = {
+        "rows": ROWS,
+        "cols": COLS,
+        "mines": MINES,
+        "first_click": (first_click_row, first_click_col),
+        "board": [[cell.is_mine for cell in row] for row in board]
+    }
+    return encode_map_seed(data)
+
+
+def pack_seed_bitmap(data):
+    """ 种子中的地雷位图：每格1位，高位在前（与bitarray默认位序一致） """
+    bitmap = bytearray((data["rows"] * data["cols"] + 7) // 8)
+    pos = 0
+    for row in data["board"]:
+        for is_mine in row:
+            if is_mine:
+                bitmap[pos >> 3] |= 0x80 >> (pos & 7)
+            pos += 1
+    return bytes(bitmap)
+
+
+def encode_map_seed(data, version="v2"):
+    """ 将种子数据编码为种子字符串，version为'v2'（紧凑位图）或'json'（旧格式） """
+    if version == "json":
+        compressed_data = zlib.compress(json.dumps(data).encode())
+        return base64.urlsafe_b64encode(compressed_data).decode()
+    if version != "v2":
+        raise ValueError(f"未知的种子格式: {version}")
+
+    rows, cols, mines = data["rows"], data["cols"], data["mines"]
+    first_click_row, first_click_col = data["first_click"]
+    # 基础信息 (行,列,雷数,首次点击位置)
+    header = bytes([
+        rows, cols, mines & 0xff, mines >> 8,
+        first_click_row, first_click_col
+    ])
+
+    # 压缩并编码
+    compressed = zlib.compress(b'v2' + header + pack_seed_bitmap(data))
+    return base64.urlsafe_b64encode(compressed).decode()
+
+
+def decode_map_seed(seed):
+    """ 解析地图种子 - 兼容新旧版本；种子无效时抛出ValueError并说明原因 """
+    seed = seed.strip()
+    if not seed:
+        raise ValueError("种子为空")
     try:
-        import bitarray
-        import base64
-
-        # 版本标识
-        version = b'v2'
-
-        # 基础信息 (行,列,雷数,首次点击位置)
-        header = bytes([
-            ROWS, COLS, MINES & 0xff, MINES >> 8,
-            first_click_row, first_click_col
-        ])
-
-        # 生成地雷位图
-        ba = bitarray.bitarray()
-        for row in board:
-            for cell in row:
-                ba.append(cell.is_mine)
-
-        # 压缩并编码
-        compressed = zlib.compress(version + header + ba.tobytes())
-        return base64.urlsafe_b64encode(compressed).decode()
-    except:
-        # 新编码方式失败时回退到旧方法
-        import base64
-        import json
+        raw = base64.urlsafe_b64decode(seed)
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"base64解码失败: {e}") from None
+    try:
+        decompressed_data = zlib.decompress(raw)
+    except zlib.error as e:
+        raise ValueError(f"zlib解压失败: {e}") from None
+
+    # 检测是否为新的紧凑格式 (开头是'v2')
+    if decompressed_data.startswith(b'v2'):
+        if len(decompressed_data) < 8:
+            raise ValueError("v2种子的头部不完整")
+        rows, cols, mines_low, mines_high, first_row, first_col = decompressed_data[2:8]
+        mines = mines_low | (mines_high << 8)
+        bitmap = decompressed_data[8:]
+        if len(bitmap) != (rows * cols + 7) // 8:
+            raise ValueError(f"地雷位图长度为{len(bitmap)}字节，{rows}x{cols}的棋盘需要{(rows * cols + 7) // 8}字节")
+        board = [[bool(bitmap[pos >> 3] & (0x80 >> (pos & 7))) for pos in range(i * cols, (i + 1) * cols)]
+                 for i in range(rows)]
         data = {
-            "rows": ROWS,
-            "cols": COLS,
-            "mines": MINES,
-            "first_click": (first_click_row, first_click_col),
-            "board": [[cell.is_mine for cell in row] for row in board]
+            "rows": rows,
+            "cols": cols,
+            "mines": mines,
+            "first_click": (first_row, first_col),
+            "board": board
         }
-        compressed_data = zlib.compress(json.dumps(data).encode())
-        return base64.urlsafe_b64encode(compressed_data).decode()
+    else:
+        # 解析旧格式
+        try:
+            data = json.loads(decompressed_data.decode())
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise ValueError(f"旧格式JSON解析失败: {e}") from None
+        if not isinstance(data, dict):
+            raise ValueError("旧格式种子不是JSON对象")
+        missing = [key for key in ("rows", "cols", "mines", "first_click", "board") if key not in data]
+        if missing:
+            raise ValueError(f"旧格式种子缺少字段: {', '.join(missing)}")
+        rows, cols, mines = data["rows"], data["cols"], data["mines"]
+        if not all(isinstance(v, int) for v in (rows, cols, mines)):
+            raise ValueError("行数、列数和雷数必须是整数")
+        board = data["board"]
+        if not isinstance(board, list) or len(board) != rows or any(
+                not isinstance(row, list) or len(row) != cols for row in board):
+            raise ValueError(f"地雷布局不是{rows}x{cols}的二维数组")
+        first_click = data["first_click"]
+        if not isinstance(first_click, (list, tuple)) or len(first_click) != 2:
+            raise ValueError("首次点击位置格式错误")
+        first_row, first_col = first_click
+
+    if rows <= 0 or cols <= 0:
+        raise ValueError(f"棋盘尺寸无效: {rows}x{cols}")
+    if not (isinstance(first_row, int) and isinstance(first_col, int)
+            and 0 <= first_row < rows and 0 <= first_col < cols):
+        raise ValueError(f"首次点击位置({first_row}, {first_col})超出棋盘")
+    actual_mines = sum(1 for row in data["board"] for is_mine in row if is_mine)
+    if actual_mines != mines:
+        raise ValueError(f"声明雷数为{mines}，地雷布局中实际有{actual_mines}个")
+    return data
 
 
 def parse_map_seed(seed):
-    """ 解析地图种子 - 兼容新旧版本 """
-    import base64
-    import bitarray
-
+    """ 解析地图种子 - 兼容新旧版本；种子无效时返回None """
     try:
-        decompressed_data = zlib.decompress(base64.urlsafe_b64decode(seed))
-
-        # 检测是否为新的紧凑格式 (开头是'v2')
-        if decompressed_data.startswith(b'v2'):
-            # 解析新格式
-            header = decompressed_data[2:8]
-            rows, cols, mines_low, mines_high, first_row, first_col = header
-            mines = mines_low | (mines_high << 8)
-
-            # 读取地雷位图
-            ba = bitarray.bitarray()
-            ba.frombytes(decompressed_data[8:])
-
-            # 构建返回数据
-            data = {
-                "rows": rows,
-                "cols": cols,
-                "mines": mines,
-                "first_click": (first_row, first_col),
-                "board": []
-            }
-
-            # 重建地雷分布
-            pos = 0
-            for _ in range(rows):
-                row = []
-                for _ in range(cols):
-                    row.append(ba[pos])
-                    pos += 1
-                data["board"].append(row)
-
-            return data
-        else:
-            # 解析旧格式
-            data = json.loads(decompressed_data.decode())
-            return data
-    except:
+        return decode_map_seed(seed)
+    except ValueError:
         return None
 
 
+def mine_layout_hash(data):
+    """ 地雷布局的规范哈希：只取决于尺寸和地雷位置，与种子格式和首次点击无关 """
+    header = struct.pack('<HH', data["rows"], data["cols"])
+    return hashlib.sha256(header + pack_seed_bitmap(data)).hexdigest()
+
+
+def iter_batches(iterable, size):
+    """ 按固定大小分批读取种子等流式输入，保证内存占用与输入大小无关 """
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
 def create_board_safe_first_click(first_click_row, first_click_col, seed=None):
-    """ 确保第一次点击的格子及其周围8个格子都不是雷 """
+    """ 确保第一次点击的格子及其邻居（按当前拓扑的邻居表）都不是雷 """
     if seed:
         parsed_seed = parse_map_seed(seed)
         if parsed_seed and parsed_seed["rows"] == ROWS and parsed_seed["cols"] == COLS and parsed_seed[
@@ -230,19 +512,15 @@ def create_board_safe_first_click(first_click_row, first_click_col, seed=None):
                     board[i][j].is_mine = parsed_seed["board"][i][j]
 
             # 修复：添加雷数计算
-            for i in range(ROWS):
-                for j in range(COLS):
-                    if not board[i][j].is_mine:
-                        board[i][j].neighbor_mines = count_neighbor_mines(board, i, j)
+            fill_neighbor_mines(board)
             return board
 
     board = [[Cell() for _ in range(COLS)] for _ in range(ROWS)]
 
-    # 生成所有可能的地雷位置，排除第一次点击的格子及其周围8个格子
-    safe_positions = set()
-    for i in range(max(0, first_click_row - 1), min(ROWS, first_click_row + 2)):
-        for j in range(max(0, first_click_col - 1), min(COLS, first_click_col + 2)):
-            safe_positions.add(i * COLS + j)
+    # 生成所有可能的地雷位置，排除第一次点击的格子及其在邻居表中的邻居（hex为6个，torus跨边界循环）
+    table = neighbor_table()
+    first_pos = first_click_row * COLS + first_click_col
+    safe_positions = {first_pos, *table.positions(first_pos)}
 
     # 从所有可能的位置中排除安全位置
     all_positions = set(range(ROWS * COLS))
@@ -254,24 +532,24 @@ def create_board_safe_first_click(first_click_row, first_click_col, seed=None):
         board[x][y].is_mine = True
 
     # 计算相邻雷数
-    for i in range(ROWS):
-        for j in range(COLS):
-            if not board[i][j].is_mine:
-                board[i][j].neighbor_mines = count_neighbor_mines(board, i, j)
+    fill_neighbor_mines(board)
     return board
 
 
 def reveal_safe_area(game, row, col):
-    cell = game.board[row][col]
-    if cell.revealed or cell.flagged or cell.is_mine:
-        return
+    table = neighbor_table()
+    cols = table.cols
+    # 用显式栈代替递归，大棋盘的大片空白也不会超出递归深度
+    stack = [row * cols + col]
+    while stack:
+        pos = stack.pop()
+        cell = game.board[pos // cols][pos % cols]
+        if cell.revealed or cell.flagged or cell.is_mine:
+            continue
 
-    cell.revealed = True
-    if cell.neighbor_mines == 0:
-        for i in range(max(0, row - 1), min(ROWS, row + 2)):
-            for j in range(max(0, col - 1), min(COLS, col + 2)):
-                if i != row or j != col:
-                    reveal_safe_area(game, i, j)
+        cell.revealed = True
+        if cell.neighbor_mines == 0:
+            stack.extend(table.positions(pos))
 
 
 def handle_middle_click(game, row, col):
@@ -279,24 +557,16 @@ def handle_middle_click(game, row, col):
     if not cell.revealed or cell.flagged:
         return
 
-    flags_around = 0
-    neighbors = []
-    for i in range(max(0, row - 1), min(ROWS, row + 2)):
-        for j in range(max(0, col - 1), min(COLS, col + 2)):
-            if i == row and j == col:
-                continue
-            neighbors.append((i, j))
-            if game.board[i][j].flagged:
-                flags_around += 1
+    neighbors = neighbor_table().neighbors(row, col)
+    flags_around = sum(1 for i, j in neighbors if game.board[i][j].flagged)
 
     if flags_around == cell.neighbor_mines:
         for i, j in neighbors:
-            if 0 <= i < ROWS and 0 <= j < COLS:
-                neighbor = game.board[i][j]
-                if not neighbor.flagged and not neighbor.revealed:
-                    if neighbor.is_mine:
-                        game.game_over = True
-                    reveal_safe_area(game, i, j)
+            neighbor = game.board[i][j]
+            if not neighbor.flagged and not neighbor.revealed:
+                if neighbor.is_mine:
+                    game.game_over = True
+                reveal_safe_area(game, i, j)
 
 
 def check_victory(game):
@@ -351,6 +621,118 @@ def show_cheat_confirmation(screen):
                     return False
 
 
+@lru_cache(maxsize=64)
+def tile_surface(kind, tile_font, size):
+    """ 缓存的格子贴图，kind为'hidden'/'revealed'/'flag'/'flag_revealed'/'question'/
+    'wrong_flag'/'mine'/'cheat' 或数字1-8 """
+    tile = pygame.Surface((size - 2, size - 2))
+    if kind in ("hidden", "flag", "question"):
+        tile.fill(COLORS["hidden"])
+    elif kind == "cheat":
+        tile.fill((255, 182, 193))  # 作弊高亮的淡红色
+    else:
+        tile.fill(COLORS["revealed"])
+
+    if kind in ("flag", "flag_revealed"):
+        pygame.draw.polygon(tile, (255, 0, 0), [
+            (size // 2, size // 4),
+            (size // 2, size // 1.5),
+            (size // 4, size // 1.5)
+        ])
+    elif kind == "question":
+        text = tile_font.render("?", True, (0, 0, 0))
+        tile.blit(text, (size / 2 - 5 - 1, size / 2 - 10 - 1))
+    elif kind == "wrong_flag":
+        # 实际不为地雷的旗帜格子，显示为打叉
+        pygame.draw.line(tile, (255, 0, 0), (size // 4, size // 4), (3 * size // 4, 3 * size // 4), 3)
+        pygame.draw.line(tile, (255, 0, 0), (size // 4, 3 * size // 4), (3 * size // 4, size // 4), 3)
+    elif kind == "mine":
+        pygame.draw.circle(tile, (0, 0, 0), (size / 2 - 1, size / 2 - 1), 8)
+    elif isinstance(kind, int):
+        text = tile_font.render(str(kind), True, NUMBER_COLORS[kind])
+        tile.blit(text, (size / 2 - 5 - 1, size / 2 - 10 - 1))
+    return tile
+
+
+def cell_tile_kind(cell, show_all):
+    """ 格子应使用的贴图；show_all为True时（游戏结束）显示全部地雷 """
+    if cell.cheat_highlighted and cell.is_mine and not cell.flagged:
+        return "cheat"
+    if cell.revealed or show_all:  # 修改：游戏结束时显示所有地雷
+        if cell.neighbor_mines > 0 and not cell.is_mine:
+            return "wrong_flag" if cell.flagged else cell.neighbor_mines
+        if cell.is_mine:
+            # 游戏结束时保持旗帜不变
+            return "flag_revealed" if cell.flagged and show_all else "mine"
+        return "revealed"
+    if cell.flagged:
+        return "flag"
+    if cell.question_mark:
+        return "question"
+    return "hidden"
+
+
+def render_board(surface, game, render_font, show_status=True):
+    """ 将棋盘和状态栏绘制到任意Surface上，不读取鼠标、键盘，也不刷新显示
+
+    show_status为False时只画棋盘，不画结束提示、剩余雷数、时间和作弊次数等交互信息（用于导出图片）
+    """
+    width, height = surface.get_size()
+    show_all = game.game_over or game.victory
+    surface.fill(COLORS["bg"])
+
+    # 绘制网格
+    surface.blits([
+        (tile_surface(cell_tile_kind(cell, show_all), render_font, GRID_SIZE), (j * GRID_SIZE, i * GRID_SIZE))
+        for i, row in enumerate(game.board) for j, cell in enumerate(row)
+    ], doreturn=False)
+
+    # 如果用户传入了种子且处于首次点击前，绘制空心圆提示位置
+    if game.user_provided_seed and game.first_click:
+        parsed_seed = parse_map_seed(game.map_seed)
+        if parsed_seed:
+            first_click_row, first_click_col = parsed_seed["first_click"]
+            rect = pygame.Rect(first_click_col * GRID_SIZE, first_click_row * GRID_SIZE, GRID_SIZE - 2,
+                               GRID_SIZE - 2)
+            pygame.draw.circle(surface, (255, 255, 0), (rect.centerx, rect.centery), GRID_SIZE // 4, 2)
+
+    if not show_status:
+        return
+
+    # 状态显示
+    if show_all:
+        status_text = "Game Over!" if game.game_over else "You Win!"
+        text = render_font.render(status_text, True, COLORS["mine_count"])
+        text_rect = text.get_rect(center=(width // 2, height // 2))  # 修改：将文字显示在屏幕中央
+        surface.blit(text, text_rect)
+        text = render_font.render("Press R to restart", True, COLORS["mine_count"])
+        text_rect = text.get_rect(center=(width // 2, height // 2 + 30))  # 修改：将文字显示在屏幕中央
+        surface.blit(text, text_rect)
+
+    # 剩余雷数
+    remaining = MINES - sum(cell.flagged for row in game.board for cell in row)
+    text = render_font.render(f"Mines left: {remaining}", True, COLORS["mine_count"])
+    text_rect = text.get_rect(topleft=(10, height - 40))
+    surface.blit(text, text_rect)
+
+    # 游戏时间：结束后显示结束时记录的精确用时，进行中按单调时钟实时计算
+    if show_all:
+        time_label = f"Time: {game.elapsed_time:.3f}s"
+    else:
+        elapsed = game.elapsed_time if game.first_click else game.play_time()
+        time_label = f"Time: {int(elapsed)}s"
+    if game.practice:
+        time_label += " (Practice)"  # 练习成绩与正式成绩区分开
+    time_text = render_font.render(time_label, True, COLORS["timer"])
+    text_rect = time_text.get_rect(topright=(width - 10, height - 40))
+    surface.blit(time_text, text_rect)
+
+    # 剩余作弊次数（调整位置到左上角）
+    cheat_text = render_font.render(f"Cheats(Press M): {game.cheat_count}", True, COLORS["mine_count"])
+    text_rect = cheat_text.get_rect(topleft=(10, height - 70))
+    surface.blit(cheat_text, text_rect)
+
+
 def draw_board(game):
     screen.fill(COLORS["bg"])
 
@@ -366,134 +748,8 @@ def draw_board(game):
         text_rect = text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
         screen.blit(text, text_rect)
     else:
-        # 绘制棋盘
-        # 获取鼠标位置
-        mouse_x, mouse_y = pygame.mouse.get_pos()
-        mouse_row = mouse_y // GRID_SIZE
-        mouse_col = mouse_x // GRID_SIZE
-
-        # 绘制网格
-        for i in range(ROWS):
-            for j in range(COLS):
-                cell = game.board[i][j]
-                rect = pygame.Rect(j * GRID_SIZE, i * GRID_SIZE, GRID_SIZE - 2, GRID_SIZE - 2)
-
-                if cell.revealed or game.game_over or game.victory:  # 修改：游戏结束时显示所有地雷
-                    pygame.draw.rect(screen, COLORS["revealed"], rect)
-                    if cell.neighbor_mines > 0 and not cell.is_mine:
-                        if cell.flagged:
-                            # 实际不为地雷的旗帜格子，显示为打叉
-                            pygame.draw.line(screen, (255, 0, 0),
-                                             (j * GRID_SIZE + GRID_SIZE // 4, i * GRID_SIZE + GRID_SIZE // 4),
-                                             (j * GRID_SIZE + 3 * GRID_SIZE // 4, i * GRID_SIZE + 3 * GRID_SIZE // 4),
-                                             3)
-                            pygame.draw.line(screen, (255, 0, 0),
-                                             (j * GRID_SIZE + GRID_SIZE // 4, i * GRID_SIZE + 3 * GRID_SIZE // 4),
-                                             (j * GRID_SIZE + 3 * GRID_SIZE // 4, i * GRID_SIZE + GRID_SIZE // 4), 3)
-                        else:
-                            color = NUMBER_COLORS[cell.neighbor_mines]
-                            text = font.render(str(cell.neighbor_mines), True, color)
-                            screen.blit(text, (
-                            j * GRID_SIZE + (GRID_SIZE / 2 - 5) - 1, i * GRID_SIZE + (GRID_SIZE / 2 - 10) - 1))
-                    elif cell.is_mine:
-                        if game.game_over or game.victory:
-                            if cell.flagged:
-                                # 保持旗帜不变
-                                pygame.draw.polygon(screen, (255, 0, 0), [
-                                    (j * GRID_SIZE + GRID_SIZE // 2, i * GRID_SIZE + (GRID_SIZE // 4)),
-                                    (j * GRID_SIZE + (GRID_SIZE // 2), i * GRID_SIZE + (GRID_SIZE // 1.5)),
-                                    (j * GRID_SIZE + (GRID_SIZE // 4), i * GRID_SIZE + (GRID_SIZE // 1.5))
-                                ])
-                            else:
-                                # 显示地雷
-                                pygame.draw.circle(screen, (0, 0, 0),
-                                                   (j * GRID_SIZE + (GRID_SIZE / 2) - 1,
-                                                    i * GRID_SIZE + (GRID_SIZE / 2) - 1), 8)
-                        else:
-                            # 正常显示地雷
-                            pygame.draw.circle(screen, (0, 0, 0),
-                                               (j * GRID_SIZE + (GRID_SIZE / 2) - 1,
-                                                i * GRID_SIZE + (GRID_SIZE / 2) - 1), 8)
-                else:
-                    pygame.draw.rect(screen, COLORS["hidden"], rect)
-                    if cell.flagged:
-                        # 保持旗帜不变
-                        pygame.draw.polygon(screen, (255, 0, 0), [
-                            (j * GRID_SIZE + GRID_SIZE // 2, i * GRID_SIZE + (GRID_SIZE // 4)),
-                            (j * GRID_SIZE + (GRID_SIZE // 2), i * GRID_SIZE + (GRID_SIZE // 1.5)),
-                            (j * GRID_SIZE + (GRID_SIZE // 4), i * GRID_SIZE + (GRID_SIZE // 1.5))
-                        ])
-                    elif cell.question_mark:
-                        # 绘制问号
-                        text = font.render("?", True, (0, 0, 0))
-                        screen.blit(text,
-                                    (j * GRID_SIZE + (GRID_SIZE / 2 - 5) - 1, i * GRID_SIZE + (GRID_SIZE / 2 - 10) - 1))
-
-        # 如果用户传入了种子且处于首次点击前，绘制空心圆提示位置
-        if game.user_provided_seed and game.first_click:
-            parsed_seed = parse_map_seed(game.map_seed)
-            if parsed_seed:
-                first_click_row, first_click_col = parsed_seed["first_click"]
-                rect = pygame.Rect(first_click_col * GRID_SIZE, first_click_row * GRID_SIZE, GRID_SIZE - 2,
-                                   GRID_SIZE - 2)
-                pygame.draw.circle(screen, (255, 255, 0), (rect.centerx, rect.centery), GRID_SIZE // 4, 2)
-
-        # 如果按下M键且鼠标悬停在已翻开的格子上，检查周围8格的地雷情况
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_m] and 0 <= mouse_row < ROWS and 0 <= mouse_col < COLS and game.cheat_count > 0:
-            cell = game.board[mouse_row][mouse_col]
-            if cell.revealed:
-                # 使用pygame显示作弊确认对话框
-                response = show_cheat_confirmation(screen)
-                if response:
-                    for i in range(max(0, mouse_row - 1), min(ROWS, mouse_row + 2)):
-                        for j in range(max(0, mouse_col - 1), min(COLS, mouse_col + 2)):
-                            if i == mouse_row and j == mouse_col:
-                                continue
-                            neighbor = game.board[i][j]
-                            if neighbor.is_mine and not neighbor.flagged:
-                                # 将未标记的地雷格子颜色变为淡红色
-                                rect = pygame.Rect(j * GRID_SIZE, i * GRID_SIZE, GRID_SIZE - 2, GRID_SIZE - 2)
-                                pygame.draw.rect(screen, (255, 182, 193), rect)
-                                neighbor.cheat_highlighted = True  # 标记为作弊高亮
-                    game.cheat_count -= 1  # 减少作弊次数
-
-        # 绘制被作弊高亮的地雷格子
-        for i in range(ROWS):
-            for j in range(COLS):
-                cell = game.board[i][j]
-                if hasattr(cell, 'cheat_highlighted') and cell.cheat_highlighted and cell.is_mine and not cell.flagged:
-                    rect = pygame.Rect(j * GRID_SIZE, i * GRID_SIZE, GRID_SIZE - 2, GRID_SIZE - 2)
-                    pygame.draw.rect(screen, (255, 182, 193), rect)
-
-        # 状态显示
-        if game.game_over or game.victory:
-            status_text = "Game Over!" if game.game_over else "You Win!"
-            text = font.render(status_text, True, COLORS["mine_count"])
-            text_rect = text.get_rect(center=(WIDTH // 2, HEIGHT // 2))  # 修改：将文字显示在屏幕中央
-            screen.blit(text, text_rect)
-            text = font.render("Press R to restart", True, COLORS["mine_count"])
-            text_rect = text.get_rect(center=(WIDTH // 2, HEIGHT // 2 + 30))  # 修改：将文字显示在屏幕中央
-            screen.blit(text, text_rect)
-
-        # 剩余雷数
-        remaining = MINES - sum(cell.flagged for row in game.board for cell in row)
-        text = font.render(f"Mines left: {remaining}", True, COLORS["mine_count"])
-        text_rect = text.get_rect(topleft=(10, HEIGHT - 40))
-        screen.blit(text, text_rect)
-
-        # 游戏时间（修改时间计算逻辑）
-        if not game.game_over and not game.victory and (game.first_click is False) and not game.paused:
-            current_time = pygame.time.get_ticks()
-            game.elapsed_time = (current_time - game.start_time - game.total_paused_duration) // 1000
-        time_text = font.render(f"Time: {game.elapsed_time}s", True, COLORS["timer"])
-        text_rect = time_text.get_rect(topright=(WIDTH - 10, HEIGHT - 40))
-        screen.blit(time_text, text_rect)
-
-        # 剩余作弊次数（调整位置到左上角）
-        cheat_text = font.render(f"Cheats(Press M): {game.cheat_count}", True, COLORS["mine_count"])
-        text_rect = cheat_text.get_rect(topleft=(10, HEIGHT - 70))
-        screen.blit(cheat_text, text_rect)
+        # 绘制棋盘（只读取游戏状态，输入和规则都在主循环的事件处理中）
+        render_board(screen, game, font)
 
     pygame.display.flip()
 
@@ -676,57 +932,215 @@ def save_map_seed_to_file(map_seed):
             file.write(map_seed)
 
 
-def main():
-    global ROWS, COLS, MINES, WIDTH, HEIGHT, GRID_SIZE, font, screen
+def build_save_data(game):
+    """ 将对局编码为二进制存档：文件头 + 地雷位图 + 2位状态平面 + 作弊高亮位图 + 种子 """
+    elapsed = int(game.play_time() * 1000)
+    paused = int(game.paused_duration() * 1000)
+    flags = (game.game_over | game.victory << 1 | game.user_provided_seed << 2
+             | game.map_seed_save << 3 | game.first_click << 4 | game.practice << 5)
+    seed = (game.map_seed or "").encode()
+    header = SAVE_HEADER.pack(SAVE_MAGIC, SAVE_VERSION, ROWS, COLS, MINES, game.cheat_count, flags,
+                              elapsed, paused, len(seed))
+    return (header + pack_mines(game.board) + pack_cell_states(game.board)
+            + pack_cell_bits(game.board, "cheat_highlighted") + seed)
 
-    # 显示设置对话框
-    settings = show_setting_dialog(screen)
-    if settings is None:
-        pygame.quit()
-        sys.exit()
 
-    ROWS, COLS, MINES, map_seed = settings  # 获取用户输入的设置，包括种子
-    WIDTH, HEIGHT = GRID_SIZE * COLS, GRID_SIZE * ROWS + 80
+def write_save_file(data, path=SAVE_FILE):
+    """ 先写临时文件再替换，避免中途退出留下损坏的存档；每次写入使用独立的临时文件，多个保存线程互不干扰 """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        os.remove(tmp_path)
+        raise
+
+
+def save_game(game, path=SAVE_FILE):
+    """ 在后台线程中保存对局，返回写文件的线程 """
+    if game.first_click or game.game_over or game.victory:
+        return None
+    thread = threading.Thread(target=write_save_file, args=(build_save_data(game), path))
+    thread.start()
+    return thread
 
-    font = pygame.font.SysFont("SimHei", max(int(20 * COLS / 30), 14))
 
-    # 重新初始化屏幕
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))
-    pygame.display.set_caption("扫雷-自制版")
+def remove_save_file(path=SAVE_FILE):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# 存档解码查找表：每个字节对应8个格子的1位标志 / 4个格子的状态（低位在前）
+_BIT_BYTE_TABLE = [bytes((b >> k) & 1 for k in range(8)) for b in range(256)]
+_STATE_BYTE_TABLE = [bytes((b >> (k << 1)) & 3 for k in range(4)) for b in range(256)]
+
+
+def load_game(path=SAVE_FILE):
+    """ 读取存档并恢复对局，同时更新全局的行、列、雷数；失败时返回None """
+    global ROWS, COLS, MINES
+
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+    except OSError:
+        return None
+    if len(data) < SAVE_HEADER.size:
+        return None
+    (magic, version, rows, cols, mines, cheat_count, flags,
+     elapsed, paused, seed_len) = SAVE_HEADER.unpack_from(data)
+    mines_size = (rows * cols + 7) // 8
+    states_size = (rows * cols + 3) // 4
+    highlights_size = mines_size if version >= 2 else 0  # 版本1没有作弊高亮位图
+    seed_offset = SAVE_HEADER.size + mines_size + states_size + highlights_size
+    if magic != SAVE_MAGIC or not 1 <= version <= SAVE_VERSION or not rows or not cols or len(data) != (
+            seed_offset + seed_len):
+        return None
+    view = memoryview(data)
+    try:
+        map_seed = bytes(view[seed_offset:]).decode() or None
+    except UnicodeDecodeError:
+        return None
+
+    ROWS, COLS, MINES = rows, cols, mines
+    mines_data = view[SAVE_HEADER.size:SAVE_HEADER.size + mines_size]
+    states_data = view[SAVE_HEADER.size + mines_size:SAVE_HEADER.size + mines_size + states_size]
+    highlights_data = view[SAVE_HEADER.size + mines_size + states_size:seed_offset]
+
+    # 整块解码：位图经查找表展开为每格一个字节，不逐位移位
+    n = rows * cols
+    mine_flags = b"".join(map(_BIT_BYTE_TABLE.__getitem__, mines_data))[:n]
+    states = b"".join(map(_STATE_BYTE_TABLE.__getitem__, states_data))[:n]
 
     game = GameState()
+    for x, row in enumerate(game.board):
+        start = x * cols
+        for cell, is_mine, state in zip(row, mine_flags[start:start + cols], states[start:start + cols]):
+            if is_mine:
+                cell.is_mine = True
+            if state == STATE_REVEALED:
+                cell.revealed = True
+            elif state == STATE_FLAGGED:
+                cell.flagged = True
+            elif state == STATE_QUESTION:
+                cell.question_mark = True
+    fill_neighbor_mines(game.board, mine_flags)
+
+    # 作弊高亮的格子很少，只查找置位的格子
+    if any(highlights_data):
+        highlights = b"".join(map(_BIT_BYTE_TABLE.__getitem__, highlights_data))[:n]
+        pos = highlights.find(1)
+        while pos >= 0:
+            game.board[pos // cols][pos % cols].cheat_highlighted = True
+            pos = highlights.find(1, pos + 1)
+
+    game.cheat_count = cheat_count
+    game.game_over = bool(flags & 1)
+    game.victory = bool(flags & 2)
+    game.user_provided_seed = bool(flags & 4)
+    game.map_seed_save = bool(flags & 8)
+    game.first_click = bool(flags & 16)
+    game.practice = bool(flags & 32)
+    game.map_seed = map_seed
+    game.total_paused_duration = paused / 1000
+    game.start_time = time.perf_counter() - (elapsed + paused) / 1000
+    game.elapsed_time = elapsed / 1000
+    return game
+
+
+def record_finish(game):
+    """ 对局结束时按单调时钟记录精确用时，并删除存档 """
+    if game.game_over or game.victory:
+        game.elapsed_time = game.play_time()
+        remove_save_file()  # 对局结束后不再保留存档
 
-    if map_seed:  # 根据种子初始化棋盘
-        parsed_seed = parse_map_seed(map_seed)
-        if parsed_seed:
-            ROWS, COLS, MINES = parsed_seed["rows"], parsed_seed["cols"], parsed_seed["mines"]
-            WIDTH, HEIGHT = GRID_SIZE * COLS, GRID_SIZE * ROWS + 80
-            game.board = create_board_safe_first_click(*parsed_seed["first_click"], seed=map_seed)
-            game.map_seed = map_seed
-            game.user_provided_seed = True
-            game.start_time = pygame.time.get_ticks()
-            screen = pygame.display.set_mode((WIDTH, HEIGHT))
-            pygame.display.set_caption("扫雷-自制版")
-
-            if not game.map_seed_save:
-                save_map_seed_to_file(game.map_seed)
-                game.map_seed_save = True
-        else:
+
+def main():
+    global ROWS, COLS, MINES, WIDTH, HEIGHT, GRID_SIZE, font, screen
+
+    # 新增：存在未完成的存档时直接恢复对局
+    game = load_game()
+    if game is not None:
+        WIDTH, HEIGHT = GRID_SIZE * COLS, GRID_SIZE * ROWS + 80
+        font = pygame.font.SysFont("SimHei", max(int(20 * COLS / 30), 14))
+        screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption("扫雷-自制版")
+        # 恢复后保持暂停，玩家按P继续
+        game.paused = True
+        game.pause_start_time = time.perf_counter()
+    else:
+        # 显示设置对话框
+        settings = show_setting_dialog(screen)
+        if settings is None:
             pygame.quit()
             sys.exit()
 
+        ROWS, COLS, MINES, map_seed = settings  # 获取用户输入的设置，包括种子
+        WIDTH, HEIGHT = GRID_SIZE * COLS, GRID_SIZE * ROWS + 80
+
+        font = pygame.font.SysFont("SimHei", max(int(20 * COLS / 30), 14))
+
+        # 重新初始化屏幕
+        screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption("扫雷-自制版")
+
+        game = GameState()
+
+        if map_seed:  # 根据种子初始化棋盘
+            try:
+                parsed_seed = decode_map_seed(map_seed)
+            except ValueError as e:
+                print(f"地图种子无效：{e}")
+                parsed_seed = None
+            if parsed_seed:
+                ROWS, COLS, MINES = parsed_seed["rows"], parsed_seed["cols"], parsed_seed["mines"]
+                WIDTH, HEIGHT = GRID_SIZE * COLS, GRID_SIZE * ROWS + 80
+                game.board = create_board_safe_first_click(*parsed_seed["first_click"], seed=map_seed)
+                game.map_seed = map_seed
+                game.user_provided_seed = True
+                game.start_time = time.perf_counter()
+                screen = pygame.display.set_mode((WIDTH, HEIGHT))
+                pygame.display.set_caption("扫雷-自制版")
+
+                if not game.map_seed_save:
+                    save_map_seed_to_file(game.map_seed)
+                    game.map_seed_save = True
+            else:
+                pygame.quit()
+                sys.exit()
+
     running = True
+    pressed_buttons = set()  # 根据按下/松开事件维护的鼠标按键状态
+    dirty = False  # 游戏状态是否变化、需要立即重绘
 
     draw_board(game)
+    next_frame = time.perf_counter() + 1 / RENDER_FPS
 
     while running:
-        # 游戏时间更新移到draw_board函数中
-        for event in pygame.event.get():
+        # 没有待处理事件时阻塞等待，直到有输入或到下一帧；输入处理不受渲染帧率限制
+        events = pygame.event.get()
+        timeout = int((next_frame - time.perf_counter()) * 1000) + 1  # 向上取整（毫秒）
+        if not events and timeout > 0:  # 注意：wait(0)会无限等待
+            events = [pygame.event.wait(timeout)]
+
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
+                save_game(game)  # 新增：退出时自动存档（sys.exit会等待写线程结束）
                 pygame.quit()
                 sys.exit()
 
+            if event.type in (pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN):
+                dirty = True
+            if event.type == pygame.MOUSEBUTTONUP:
+                pressed_buttons.discard(event.button)
+            elif event.type == pygame.WINDOWFOCUSLOST:
+                pressed_buttons.clear()  # 失去焦点时收不到松开事件
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                pressed_buttons.add(event.button)
+
             if not game.paused:  # 只在未暂停时处理用户输入
                 if event.type == pygame.MOUSEBUTTONDOWN and not game.game_over and not game.victory:
                     x, y = event.pos
@@ -737,8 +1151,8 @@ def main():
                         continue
 
                     if not game.user_provided_seed and game.first_click:
-                        # 第一次点击时创建棋盘，确保点击的格子及其周围8个格子都不是雷
-                        game.start_time = pygame.time.get_ticks()
+                        # 第一次点击时创建棋盘，确保点击的格子及其邻居都不是雷
+                        game.start_time = time.perf_counter()
                         game.board = game.create_board(row, col)
                         game.map_seed = generate_map_seed(row, col, game.board)
                         print(f"当前地图种子：{game.map_seed}")
@@ -747,8 +1161,12 @@ def main():
                             game.map_seed_save = True
 
                     cell = game.board[row][col]
+                    before = game.snapshot() if event.button in (1, 3) else None  # 新增：记录快照以便撤销
 
-                    if event.button == 1:  # 左键点击
+                    # 检测左右键同时按下：按事件顺序判断，第二个键按下即触发
+                    if event.button in (1, 3) and {1, 3} <= pressed_buttons:
+                        handle_middle_click(game, row, col)
+                    elif event.button == 1:  # 左键点击
                         if game.first_click:
                             game.first_click = False
                         if not cell.flagged and not cell.question_mark:
@@ -770,36 +1188,67 @@ def main():
                             elif cell.question_mark:
                                 cell.question_mark = False
 
-                    # 检测左右键同时按下
-                    if pygame.mouse.get_pressed() == (1, 0, 1):  # 左键和右键同时按下
-                        handle_middle_click(game, row, col)
-
                     # 确保胜利条件只在适当的时候检查
                     if check_victory(game):
                         game.victory = True
 
+                    if before is not None:
+                        game.record_history(before)
+                    record_finish(game)
+
                 if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_r:  # 重置游戏
+                    if event.key == pygame.K_r:  # 重置游戏（保留练习模式）
+                        practice = game.practice
                         game = GameState()
+                        game.practice = practice
+                        remove_save_file()
+                    elif event.key == pygame.K_t and game.first_click:  # 新增：开局前切换练习模式
+                        game.practice = not game.practice
+                    elif event.key == pygame.K_u:  # 新增：练习模式下撤销（追加罚时）
+                        game.undo()
+                    elif event.key == pygame.K_m:  # 作弊：鼠标悬停在已翻开的格子上时，标出其邻居中的地雷
+                        x, y = pygame.mouse.get_pos()
+                        col = x // GRID_SIZE
+                        row = y // GRID_SIZE
+                        if (0 <= row < ROWS and 0 <= col < COLS and game.cheat_count > 0
+                                and game.board[row][col].revealed):
+                            # 使用pygame显示作弊确认对话框
+                            response = show_cheat_confirmation(screen)
+                            pressed_buttons.clear()  # 对话框的事件循环吞掉了鼠标松开事件
+                            if response:
+                                for i, j in neighbor_table().neighbors(row, col):
+                                    neighbor = game.board[i][j]
+                                    if neighbor.is_mine and not neighbor.flagged:
+                                        neighbor.cheat_highlighted = True  # 标记为作弊高亮，绘制时显示为淡红色
+                                game.cheat_count -= 1  # 减少作弊次数
                     elif event.key == pygame.K_SPACE:  # 空格键
                         x, y = pygame.mouse.get_pos()
                         col = x // GRID_SIZE
                         row = y // GRID_SIZE
-                        if 0 <= row < ROWS and 0 <= col < COLS:
+                        if 0 <= row < ROWS and 0 <= col < COLS and not game.game_over and not game.victory:
+                            before = game.snapshot()
                             handle_middle_click(game, row, col)
+                            if check_victory(game):
+                                game.victory = True
+                            game.record_history(before)
+                            record_finish(game)
 
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_p:  # 新增：暂停功能
                     game.paused = not game.paused
                     if game.paused:
-                        game.pause_start_time = pygame.time.get_ticks()
+                        game.pause_start_time = time.perf_counter()
+                        save_game(game)  # 新增：暂停时自动存档
                     else:
                         # 累计暂停时间
-                        pause_duration = pygame.time.get_ticks() - game.pause_start_time
+                        pause_duration = time.perf_counter() - game.pause_start_time
                         game.total_paused_duration += pause_duration
 
-        draw_board(game)
-        clock.tick(30)
+        now = time.perf_counter()
+        if dirty or now >= next_frame:
+            draw_board(game)
+            dirty = False
+            next_frame = now + 1 / RENDER_FPS
 
 
 if __name__ == "__main__":
@@ -0,0 +1,100 @@
+""" 地图种子库工具：校验、格式转换、按地雷布局去重
+
+用法：
+    python seed_tool.py validate seeds.txt
+    python seed_tool.py convert seeds.txt --to v2 -o out.txt
+    python seed_tool.py dedup seeds.txt --index seeds.db -o unique.txt
+
+逐行流式读取，按批并行解码，内存占用与文件大小无关；
+无效种子的行号和原因输出到标准错误。去重索引是磁盘上的SQLite数据库，可跨多次运行累积。
+"""
+import argparse
+import os
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+# 无窗口运行：导入游戏模块前切换到SDL的dummy驱动
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from minesweeper import decode_map_seed, encode_map_seed, iter_batches, mine_layout_hash  # noqa: E402
+
+
+def process_seed(seed, to=None):
+    """ 在工作进程中解码单个种子，返回 (错误原因, 转换后的种子, 布局哈希) """
+    try:
+        data = decode_map_seed(seed)
+        converted = encode_map_seed(data, to) if to else seed
+    except ValueError as e:
+        return str(e), None, None
+    return None, converted, mine_layout_hash(data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="地图种子库的校验、格式转换与去重")
+    parser.add_argument("command", choices=("validate", "convert", "dedup"))
+    parser.add_argument("seeds", help="种子文件，每行一个种子；'-'表示标准输入")
+    parser.add_argument("--to", choices=("v2", "json"), help="convert：目标格式")
+    parser.add_argument("--index", help="dedup：磁盘去重索引文件")
+    parser.add_argument("-o", "--output", help="输出文件，默认标准输出")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="工作进程数")
+    parser.add_argument("--batch", type=int, default=4096, help="每批读取的种子数")
+    args = parser.parse_args(argv)
+    if args.command == "convert" and not args.to:
+        parser.error("convert 需要指定 --to")
+    if args.command == "dedup" and not args.index:
+        parser.error("dedup 需要指定 --index")
+
+    seeds_file = sys.stdin if args.seeds == "-" else open(args.seeds, encoding="utf-8")
+    output = sys.stdout if not args.output else open(args.output, "w", encoding="utf-8")
+    index = None
+    if args.command == "dedup":
+        index = sqlite3.connect(args.index)
+        index.execute("CREATE TABLE IF NOT EXISTS boards (digest TEXT PRIMARY KEY, line INTEGER)")
+    worker = partial(process_seed, to=args.to if args.command == "convert" else None)
+
+    total = invalid = duplicates = 0
+    line_no = 0
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            seeds = (line.strip() for line in seeds_file)
+            for batch in iter_batches(seeds, args.batch):
+                chunksize = max(1, len(batch) // (args.workers * 4))
+                for seed, (error, converted, digest) in zip(batch, pool.map(worker, batch, chunksize=chunksize)):
+                    line_no += 1
+                    if not seed:
+                        continue
+                    total += 1
+                    if error:
+                        invalid += 1
+                        print(f"第{line_no}行: {error}", file=sys.stderr)
+                        continue
+                    if index is not None:
+                        inserted = index.execute("INSERT OR IGNORE INTO boards VALUES (?, ?)", (digest, line_no))
+                        if not inserted.rowcount:
+                            duplicates += 1
+                            continue
+                    if args.command != "validate":
+                        output.write(converted + "\n")
+                if index is not None:
+                    index.commit()  # 每批提交一次
+    finally:
+        if index is not None:
+            index.commit()
+            index.close()
+        if output is not sys.stdout:
+            output.close()
+        if seeds_file is not sys.stdin:
+            seeds_file.close()
+
+    summary = f"共{total}个种子，无效{invalid}个"
+    if args.command == "dedup":
+        summary += f"，重复{duplicates}个"
+    print(summary, file=sys.stderr)
+    return 1 if invalid and args.command == "validate" else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())